@@ -28,6 +28,13 @@ def parsing_decorator(input_args, output_args, optional_inputs=False, optional_o
         raise ParsingError(error_msg)
 
     def decorator(func):
+        # Everything that only depends on the decoration arguments is computed once here
+        # rather than on every call of the primitive.
+        parse = Parser.parse
+        expecting_message = "[Parsing] [Primitive - {}] Expecting {} input(s) and {} output(s). Optional inputs: {}. Optional outputs: {}".format(
+            func.__name__, input_args, output_args, optional_inputs, optional_outputs)
+        received_message = "[Parsing] [Primitive - " + func.__name__ + "] Received inputs: %s. Received outputs: %s"
+
         @wraps(func)
         def wrapper(line, variable_dict):
             """
@@ -45,12 +52,14 @@ def parsing_decorator(input_args, output_args, optional_inputs=False, optional_o
             Raises:
                 ParsingError: If an error occurs while parsing or executing the function.
             """
-            logging.debug("[Parsing] [Primitive - {}] Expecting {} input(s) and {} output(s). Optional inputs: {}. Optional outputs: {}"
-                         .format(func.__name__, input_args, output_args, optional_inputs, optional_outputs))
+            debug = logging.root.isEnabledFor(logging.DEBUG)
+            if debug:
+                logging.debug(expecting_message)
             
             try:
-                inputs, outputs = Parser.parse(line, input_args, output_args, optional_inputs, optional_outputs)
-                logging.debug("[Parsing] [Primitive - {}] Received inputs: {}. Received outputs: {}".format(func.__name__, inputs, outputs))
+                inputs, outputs = parse(line, input_args, output_args, optional_inputs, optional_outputs)
+                if debug:
+                    logging.debug(received_message, inputs, outputs)
             except ParsingError as e:
                 handle_parsing_error(func, "parsing the command line")
             except Exception as e:
@@ -0,0 +1,327 @@
+import socket
+import struct
+from functools import lru_cache
+
+
+# Offsets in a serialized IPv4 (without options) / UDP / DNS packet.
+IP_TOTAL_LENGTH_OFFSET = 2
+IP_CHECKSUM_OFFSET = 10
+IP_SRC_OFFSET = 12
+UDP_OFFSET = 20
+UDP_LENGTH_OFFSET = 24
+UDP_CHECKSUM_OFFSET = 26
+DNS_ID_OFFSET = 28
+DNS_FLAGS_OFFSET = 30
+DNS_QDCOUNT_OFFSET = 32
+DNS_QUESTION_OFFSET = 40
+
+# IP/UDP/DNS headers matching Scapy's IP()/UDP()/DNS() defaults: loopback addresses, TTL 64,
+# ports 53, recursion desired and no question. Lengths and checksums are filled in on serialization.
+_TEMPLATE = (
+    struct.pack("!BBHHHBBH4s4s", 0x45, 0, 0, 1, 0, 64, socket.IPPROTO_UDP, 0,
+                socket.inet_aton("127.0.0.1"), socket.inet_aton("127.0.0.1"))
+    + struct.pack("!HHHH", 53, 53, 0, 0)
+    + struct.pack("!HHHHHH", 0, 0x0100, 0, 0, 0, 0)
+)
+
+
+def patch_qid(buf, value, offset=DNS_ID_OFFSET):
+    """
+    Write a DNS transaction ID in place into a serialized packet.
+
+    Args:
+        buf (bytearray): The serialized packet.
+        value (int): The new transaction ID.
+        offset (int, optional): The offset of the transaction ID in the buffer. Defaults to DNS_ID_OFFSET.
+    """
+    struct.pack_into("!H", buf, offset, value & 0xFFFF)
+
+
+def is_encoded_qname(name):
+    """
+    Check whether a qname is already in DNS wire format, using the same test as Scapy's DNSStrField.
+
+    Args:
+        name (bytes): The qname.
+
+    Returns:
+        bool: True if the name is length-prefixed and NUL terminated.
+    """
+    return b"." not in name and name[-1:] == b"\x00"
+
+
+@lru_cache(maxsize=4096)
+def _wire_qname(name):
+    if name == b".":
+        return b"\x00"
+    encoded = b"".join(bytes((len(label),)) + label for label in (label[:63] for label in name.split(b".")))
+    if encoded[-1:] != b"\x00":
+        encoded += b"\x00"
+    return encoded
+
+
+@lru_cache(maxsize=4096)
+def encode_qname(name):
+    """
+    Encode a domain name to DNS wire format.
+
+    Scapy passes already encoded names through unchanged when building, so the
+    encoding is only computed once per distinct name. A name whose encoding would
+    contain a '.' byte (a 46-byte label) is returned as is since Scapy could not
+    tell it apart from a dotted name.
+
+    Args:
+        name (bytes): The dotted domain name, or an already encoded one.
+
+    Returns:
+        bytes: The length-prefixed labels followed by the root label.
+    """
+    if is_encoded_qname(name):
+        return name
+    encoded = _wire_qname(name)
+    if b"." in encoded:
+        return name
+    return encoded
+
+
+@lru_cache(maxsize=4096)
+def decode_qname(name):
+    """
+    Convert a qname in DNS wire format back to its dotted form.
+
+    Args:
+        name (bytes): The qname, either encoded or dotted.
+
+    Returns:
+        bytes: The dotted name with its trailing dot, or the name unchanged if it is not
+        a well-formed encoded name.
+    """
+    if not is_encoded_qname(name):
+        return name
+    labels = []
+    offset = 0
+    while offset < len(name) and name[offset]:
+        length = name[offset]
+        if offset + 1 + length > len(name):
+            return name
+        labels.append(name[offset + 1:offset + 1 + length])
+        offset += length + 1
+    if offset != len(name) - 1:
+        # The labels must end exactly at the final root label
+        return name
+    return b".".join(labels) + b"."
+
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+def _update_checksum(checksum, old, new):
+    """
+    Incrementally update an internet checksum after a 16-bit word changed (RFC 1624, eqn. 3).
+
+    Args:
+        checksum (int): The current checksum.
+        old (int): The previous value of the word.
+        new (int): The new value of the word.
+
+    Returns:
+        int: The updated checksum.
+    """
+    total = (~checksum & 0xFFFF) + (~old & 0xFFFF) + new
+    total = (total & 0xFFFF) + (total >> 16)
+    total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+class FastDNS:
+    """
+    An IPv4/UDP/DNS query packet stored as a flat bytearray.
+
+    Header fields are read and written in place with struct, so building and
+    modifying a query does not go through Scapy's layer objects. It exposes the
+    DNS header fields used by the DNS primitives (`id`, `qr`, `rd`, `rcode`,
+    `qdcount`) and those of its single question (`qname`, `qtype`, `qclass`), so
+    it can be used both as the packet and as its question. Lengths and checksums
+    are computed when the packet is serialized with `bytes()`, and only the
+    transaction ID changing afterwards updates the UDP checksum incrementally
+    instead of summing the whole packet again.
+    """
+    __slots__ = ("buf", "_checksums_valid")
+
+    def __init__(self, buf=None):
+        """
+        Initialize the packet.
+
+        Args:
+            buf (bytes-like, optional): A serialized IPv4/UDP/DNS packet. Defaults to an empty query.
+        """
+        self.buf = bytearray(_TEMPLATE if buf is None else buf)
+        self._checksums_valid = False
+
+    def copy(self):
+        """
+        Copy the packet.
+
+        Returns:
+            FastDNS: A packet with its own copy of the buffer.
+        """
+        packet = FastDNS(self.buf)
+        packet._checksums_valid = self._checksums_valid
+        return packet
+
+    def __bytes__(self):
+        buf = self.buf
+        if self._checksums_valid:
+            return bytes(buf)
+        struct.pack_into("!H", buf, IP_TOTAL_LENGTH_OFFSET, len(buf))
+        struct.pack_into("!H", buf, UDP_LENGTH_OFFSET, len(buf) - UDP_OFFSET)
+        struct.pack_into("!H", buf, IP_CHECKSUM_OFFSET, 0)
+        struct.pack_into("!H", buf, IP_CHECKSUM_OFFSET, _checksum(bytes(buf[:UDP_OFFSET])))
+        struct.pack_into("!H", buf, UDP_CHECKSUM_OFFSET, 0)
+        pseudo_header = bytes(buf[IP_SRC_OFFSET:UDP_OFFSET]) + struct.pack("!BBH", 0, socket.IPPROTO_UDP, len(buf) - UDP_OFFSET)
+        struct.pack_into("!H", buf, UDP_CHECKSUM_OFFSET, _checksum(pseudo_header + bytes(buf[UDP_OFFSET:])) or 0xFFFF)
+        self._checksums_valid = True
+        return bytes(buf)
+
+    def to_scapy(self):
+        """
+        Convert the packet to a Scapy packet, e.g. to send it or pass it to primitives expecting one.
+
+        Returns:
+            scapy.layers.inet.IP: The dissected packet.
+        """
+        from scapy.all import IP
+        return IP(bytes(self))
+
+    def _get_short(self, offset):
+        return struct.unpack_from("!H", self.buf, offset)[0]
+
+    def _set_short(self, offset, value):
+        struct.pack_into("!H", self.buf, offset, int(value) & 0xFFFF)
+        self._checksums_valid = False
+
+    def _set_flag(self, offset, mask, value):
+        self._checksums_valid = False
+        if value:
+            self.buf[offset] |= mask
+        else:
+            self.buf[offset] &= ~mask & 0xFF
+
+    @property
+    def id(self):
+        return self._get_short(DNS_ID_OFFSET)
+
+    @id.setter
+    def id(self, value):
+        old = self.id
+        new = int(value) & 0xFFFF
+        patch_qid(self.buf, new)
+        if self._checksums_valid:
+            checksum = _update_checksum(self._get_short(UDP_CHECKSUM_OFFSET), old, new)
+            struct.pack_into("!H", self.buf, UDP_CHECKSUM_OFFSET, checksum or 0xFFFF)
+
+    @property
+    def qr(self):
+        return self.buf[DNS_FLAGS_OFFSET] >> 7
+
+    @qr.setter
+    def qr(self, value):
+        self._set_flag(DNS_FLAGS_OFFSET, 0x80, value)
+
+    @property
+    def rd(self):
+        return self.buf[DNS_FLAGS_OFFSET] & 0x01
+
+    @rd.setter
+    def rd(self, value):
+        self._set_flag(DNS_FLAGS_OFFSET, 0x01, value)
+
+    @property
+    def rcode(self):
+        return self.buf[DNS_FLAGS_OFFSET + 1] & 0x0F
+
+    @property
+    def qdcount(self):
+        return self._get_short(DNS_QDCOUNT_OFFSET)
+
+    @qdcount.setter
+    def qdcount(self, value):
+        self._set_short(DNS_QDCOUNT_OFFSET, value)
+
+    def _question_end(self):
+        """
+        Get the offset right after the encoded qname of the question.
+
+        Returns:
+            int or None: The offset, or None if the packet carries no question.
+        """
+        if len(self.buf) <= DNS_QUESTION_OFFSET:
+            return None
+        return self.buf.index(0, DNS_QUESTION_OFFSET) + 1
+
+    def _ensure_question(self):
+        if self._question_end() is None:
+            self._checksums_valid = False
+            self.buf += b"\x00" + struct.pack("!HH", 1, 1)
+            self.qdcount = 1
+
+    @property
+    def qname(self):
+        end = self._question_end()
+        if end is None:
+            return None
+        return decode_qname(bytes(self.buf[DNS_QUESTION_OFFSET:end]))
+
+    @qname.setter
+    def qname(self, value):
+        if isinstance(value, str):
+            value = value.encode()
+        self._ensure_question()
+        self._checksums_valid = False
+        self.buf[DNS_QUESTION_OFFSET:self._question_end()] = value if is_encoded_qname(value) else _wire_qname(value)
+
+    @property
+    def qtype(self):
+        end = self._question_end()
+        return None if end is None else self._get_short(end)
+
+    @qtype.setter
+    def qtype(self, value):
+        self._ensure_question()
+        self._set_short(self._question_end(), value)
+
+    @property
+    def qclass(self):
+        end = self._question_end()
+        return None if end is None else self._get_short(end + 2)
+
+    @qclass.setter
+    def qclass(self, value):
+        self._ensure_question()
+        self._set_short(self._question_end() + 2, value)
+
+    @property
+    def qd(self):
+        """
+        The question of the packet. The packet itself holds the question fields, so it
+        is returned if it has one. Assigning a Scapy DNSQR or another FastDNS copies its
+        question, assigning None removes it.
+        """
+        return self if self._question_end() is not None else None
+
+    @qd.setter
+    def qd(self, query):
+        self._checksums_valid = False
+        del self.buf[DNS_QUESTION_OFFSET:]
+        if query is None:
+            self.qdcount = 0
+            return
+        self.qname = query.qname
+        self.qtype = query.qtype
+        self.qclass = query.qclass
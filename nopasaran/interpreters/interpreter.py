@@ -1,5 +1,6 @@
 import cmd
 import logging
+import sys
 
 
 class Interpreter(cmd.Cmd):
@@ -37,6 +38,8 @@ class Interpreter(cmd.Cmd):
             The result of the command execution.
         """
         cmd, arg, line = self.parseline(line)
+        if cmd:
+            cmd = sys.intern(cmd)
         if not line:
             return self.emptyline()
         if cmd is None:
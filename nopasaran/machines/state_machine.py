@@ -46,6 +46,7 @@ class StateMachine:
                 break
             self.execute_action(next_action)
         if self.root_state_machine == self:
+            close_echo_pool()
             log_data = {
                 "State": self.current_state,
                 "Variables": self.variables
@@ -60,12 +61,12 @@ class StateMachine:
         Args:
             action (dict): The action to execute.
         """
-        logging.debug('[State Machine - {}] Executing action: {}'.format(self.machine_id, action))
+        logging.debug('[State Machine - %s] Executing action: %s', self.machine_id, action)
         if Command.EXECUTE_ACTION.name in action:
             ActionInterpreter.evaluate(action[Command.EXECUTE_ACTION.name], self)
         elif Command.ASSIGN_VARIABLES.name in action:
             self.assign_variables(action[Command.ASSIGN_VARIABLES.name])
-            logging.info('[State Machine - {}] Variables assigned: {}'.format(self.machine_id, self.variables))
+            logging.info('[State Machine - %s] Variables assigned: %s', self.machine_id, self.variables)
         elif Command.SET_STATE.name in action:
             self.update_state(action[Command.SET_STATE.name])
 
@@ -115,7 +116,7 @@ class StateMachine:
         Args:
             variables (dict): The variables to assign.
         """
-        logging.debug('[State Machine - {}] Setting variables: {}'.format(self.machine_id, variables))
+        logging.debug('[State Machine - %s] Setting variables: %s', self.machine_id, variables)
         self.variables = variables
 
     def set_variable_value(self, name, new_value):
@@ -126,7 +127,7 @@ class StateMachine:
             name (str): The name of the variable.
             new_value: The new value for the variable.
         """
-        logging.info('[State Machine - {}] Setting variable {} to: {}'.format(self.machine_id, name, new_value))
+        logging.info('[State Machine - %s] Setting variable %s to: %s', self.machine_id, name, new_value)
         self.variables[name] = new_value
 
     def get_variable_value(self, variable_name):
@@ -140,7 +141,7 @@ class StateMachine:
             The value of the variable.
         """
         if variable_name not in self.variables:
-            logging.error('[State Machine - {}] Variable {} does not exist.'.format(self.machine_id, variable_name))
+            logging.error('[State Machine - %s] Variable %s does not exist.', self.machine_id, variable_name)
         return self.variables[variable_name]
 
     def update_variable_value(self, variable_name, new_value):
@@ -151,7 +152,7 @@ class StateMachine:
             variable_name (str): The name of the variable.
             new_value: The new value for the variable.
         """
-        logging.info('[State Machine - {}] Updating variable {} to: {}'.format(self.machine_id, variable_name, new_value))
+        logging.info('[State Machine - %s] Updating variable %s to: %s', self.machine_id, variable_name, new_value)
         self.variables[variable_name] = new_value
 
     def update_sniffer_filter(self, filter):
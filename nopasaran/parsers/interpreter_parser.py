@@ -1,3 +1,6 @@
+from functools import lru_cache
+
+
 class Parser:
     """
     A class for parsing commands and validating arguments.
@@ -63,8 +66,8 @@ class Parser:
         """
         Parse the command and validate the arguments.
         
-        This method parses the command and validates the number of input and output arguments
-        based on the specified constraints.
+        State machines evaluate the same action lines over and over, so the result of
+        parsing a line is cached and only copied on later calls.
         
         Args:
             command (str): The command to parse.
@@ -80,6 +83,22 @@ class Parser:
             RuntimeError: If the command has too many or too few argument sets,
                 incorrect number of inputs or outputs, or if the arguments do not match the expected constraints.
         """
+        inputs, outputs = Parser._parse(command, input_args, output_args, optional_inputs, optional_outputs)
+        return list(inputs), list(outputs)
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _parse(command, input_args, output_args, optional_inputs=False, optional_outputs=False):
+        """
+        Cached implementation of `parse`.
+        
+        This method parses the command and validates the number of input and output arguments
+        based on the specified constraints. The arguments are returned as tuples so the cached
+        result cannot be modified by the callers.
+        
+        Returns:
+            tuple: A tuple containing two tuples: the input arguments and the output arguments.
+        """
         args = list(Parser._extract_arguments(command))
 
         num_argument_sets = sum([input_args != 0 or optional_inputs, output_args != 0 or optional_outputs])
@@ -105,4 +124,4 @@ class Parser:
         if not optional_outputs and output_args != len(outputs):
             raise RuntimeError(f"Incorrect number of outputs in '{command}'. Expected: {output_args}.")
 
-        return inputs, outputs
+        return tuple(inputs), tuple(outputs)
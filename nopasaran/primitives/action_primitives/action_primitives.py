@@ -1,65 +1,140 @@
+import importlib
+import importlib.metadata
+from functools import lru_cache
+from typing import TYPE_CHECKING, Final, Tuple
+
 from nopasaran.primitives.primitives import Primitives
-from nopasaran.primitives.action_primitives.data_manipulation import DataManipulationPrimitives
-from nopasaran.primitives.action_primitives.timing_primitives import TimingPrimitives
-from nopasaran.primitives.action_primitives.nested_machine_utils import NestedMachinePrimitives
-from nopasaran.primitives.action_primitives.data_channel_primitives import DataChannelPrimitives
-from nopasaran.primitives.action_primitives.control_channel_primitives import ControlChannelPrimitives
-from nopasaran.primitives.action_primitives.event_primitives import EventPrimitives
-from nopasaran.primitives.action_primitives.signaling_primitive import SignalingPrimitives
-from nopasaran.primitives.action_primitives.io_primitives import IOPrimitives
-from nopasaran.primitives.action_primitives.ip_primitives import IPPrimitives
-from nopasaran.primitives.action_primitives.tcp_primitives import TCPPrimitives
-from nopasaran.primitives.action_primitives.udp_primitives import UDPPrimitives
-from nopasaran.primitives.action_primitives.dns_primitives import DNSPrimitives
-from nopasaran.primitives.action_primitives.icmp_primitives import ICMPPrimitives
-from nopasaran.primitives.action_primitives.certificate_primitives import CertificatePrimitives
-from nopasaran.primitives.action_primitives.tls_primitives import TLSPrimitives
-from nopasaran.primitives.action_primitives.http_1_request_primitives import HTTP1RequestPrimitives
-from nopasaran.primitives.action_primitives.http_1_response_primitives import HTTP1ResponsePrimitives
-from nopasaran.primitives.action_primitives.http_2_server_primitives import HTTP2ServerPrimitives
-from nopasaran.primitives.action_primitives.http_2_client_primitives import HTTP2ClientPrimitives
-from nopasaran.primitives.action_primitives.server_echo_primitives import ServerEchoPrimitives
-from nopasaran.primitives.action_primitives.https_1_response_primitives import HTTPS1ResponsePrimitives
-from nopasaran.primitives.action_primitives.https_1_request_primitives import HTTPS1RequestPrimitives
-from nopasaran.primitives.action_primitives.client_echo_primitives import ClientEchoPrimitives
-from nopasaran.primitives.action_primitives.probing_primitives import PortProbingPrimitives
-from nopasaran.primitives.action_primitives.replay_primitives import ReplayPrimitives
-from nopasaran.primitives.action_primitives.http_simple_client_primitives import HTTPSimpleClientPrimitives
-from nopasaran.primitives.action_primitives.tcp_dns_request_primitives import TCPDNSRequestPrimitives
-from nopasaran.primitives.action_primitives.tcp_dns_response_primitives import TCPDNSResponsePrimitives
+
+if TYPE_CHECKING:
+    # Static view of the classes resolved lazily by __getattr__, for type checkers and IDEs
+    from nopasaran.primitives.action_primitives.data_manipulation import DataManipulationPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.timing_primitives import TimingPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.nested_machine_utils import NestedMachinePrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.data_channel_primitives import DataChannelPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.control_channel_primitives import ControlChannelPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.event_primitives import EventPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.signaling_primitive import SignalingPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.io_primitives import IOPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.ip_primitives import IPPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.tcp_primitives import TCPPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.udp_primitives import UDPPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.dns_primitives import DNSPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.icmp_primitives import ICMPPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.certificate_primitives import CertificatePrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.tls_primitives import TLSPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.http_1_request_primitives import HTTP1RequestPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.http_1_response_primitives import HTTP1ResponsePrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.http_2_server_primitives import HTTP2ServerPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.http_2_client_primitives import HTTP2ClientPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.server_echo_primitives import ServerEchoPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.https_1_response_primitives import HTTPS1ResponsePrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.https_1_request_primitives import HTTPS1RequestPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.client_echo_primitives import ClientEchoPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.probing_primitives import PortProbingPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.replay_primitives import ReplayPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.http_simple_client_primitives import HTTPSimpleClientPrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.tcp_dns_response_primitives import TCPDNSResponsePrimitives  # noqa: F401
+    from nopasaran.primitives.action_primitives.tcp_dns_request_primitives import TCPDNSRequestPrimitives  # noqa: F401
+
+
+ENTRY_POINT_GROUP = "nopasaran.action_primitives"
+
+
+# Maps each action primitive class to the sibling module defining it. The modules
+# are only imported the first time the class is referenced, so a run that never
+# touches HTTP/2 or TLS does not pay for importing h2, ssl or cryptography.
+_LAZY = {
+    "DataManipulationPrimitives": "data_manipulation",
+    "TimingPrimitives": "timing_primitives",
+    "NestedMachinePrimitives": "nested_machine_utils",
+    "DataChannelPrimitives": "data_channel_primitives",
+    "ControlChannelPrimitives": "control_channel_primitives",
+    "EventPrimitives": "event_primitives",
+    "SignalingPrimitives": "signaling_primitive",
+    "IOPrimitives": "io_primitives",
+    "IPPrimitives": "ip_primitives",
+    "TCPPrimitives": "tcp_primitives",
+    "UDPPrimitives": "udp_primitives",
+    "DNSPrimitives": "dns_primitives",
+    "ICMPPrimitives": "icmp_primitives",
+    "CertificatePrimitives": "certificate_primitives",
+    "TLSPrimitives": "tls_primitives",
+    "HTTP1RequestPrimitives": "http_1_request_primitives",
+    "HTTP1ResponsePrimitives": "http_1_response_primitives",
+    "HTTP2ServerPrimitives": "http_2_server_primitives",
+    "HTTP2ClientPrimitives": "http_2_client_primitives",
+    "ServerEchoPrimitives": "server_echo_primitives",
+    "HTTPS1ResponsePrimitives": "https_1_response_primitives",
+    "HTTPS1RequestPrimitives": "https_1_request_primitives",
+    "ClientEchoPrimitives": "client_echo_primitives",
+    "PortProbingPrimitives": "probing_primitives",
+    "ReplayPrimitives": "replay_primitives",
+    "HTTPSimpleClientPrimitives": "http_simple_client_primitives",
+    "TCPDNSResponsePrimitives": "tcp_dns_response_primitives",
+    "TCPDNSRequestPrimitives": "tcp_dns_request_primitives",
+}
+
+
+# Declaration order of the built-in primitive classes, which is also their lookup precedence.
+_CLASSES: Final[Tuple[str, ...]] = tuple(_LAZY)
+
+
+def __getattr__(name):
+    """
+    Import an action primitive class on first access (PEP 562).
+
+    Args:
+        name (str): The name of the attribute being looked up.
+
+    Returns:
+        type: The primitive class.
+
+    Raises:
+        AttributeError: If the name is not a known primitive class.
+    """
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f"nopasaran.primitives.action_primitives.{_LAZY[name]}")
+    class_ = getattr(module, name)
+    globals()[name] = class_
+    return class_
+
+
+@lru_cache(maxsize=None)
+def _plugin_entry_points():
+    """
+    Discover action primitive classes registered by other distributions.
+
+    The built-in classes are not registered in the `nopasaran.action_primitives`
+    group, they are only listed in `_LAZY`.
+
+    Returns:
+        tuple: The entry points of the third-party primitive classes.
+    """
+    entry_points = importlib.metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        group = entry_points.select(group=ENTRY_POINT_GROUP)
+    else:
+        group = entry_points.get(ENTRY_POINT_GROUP, ())
+    return tuple(group)
 
 
 class ActionPrimitives(Primitives):
     """
     Class containing action primitives for the state machine.
+
+    Built-in classes are listed by name and imported on first use. Classes
+    registered under the `nopasaran.action_primitives` entry point group are
+    appended after them the first time a primitive cannot be found among the
+    built-ins.
     """
-    classes = [
-        DataManipulationPrimitives, 
-        TimingPrimitives,
-        NestedMachinePrimitives, 
-        DataChannelPrimitives, 
-        ControlChannelPrimitives, 
-        EventPrimitives,
-        SignalingPrimitives,
-        IOPrimitives,
-        IPPrimitives, 
-        TCPPrimitives, 
-        UDPPrimitives,
-        DNSPrimitives,
-        ICMPPrimitives,
-        CertificatePrimitives,
-        TLSPrimitives,
-        HTTP1RequestPrimitives,
-        HTTP1ResponsePrimitives,
-        HTTP2ServerPrimitives,
-        HTTP2ClientPrimitives,
-        ServerEchoPrimitives,
-        HTTPS1ResponsePrimitives,
-        HTTPS1RequestPrimitives,
-        ClientEchoPrimitives,
-        PortProbingPrimitives,
-        ReplayPrimitives,
-        HTTPSimpleClientPrimitives,
-        TCPDNSResponsePrimitives,
-        TCPDNSRequestPrimitives
-        ]
+    __slots__ = ()
+    classes = _CLASSES
+    _plugins_loaded = False
+
+    @classmethod
+    def _index_next_class(cls):
+        if cls._indexed == len(cls.classes) and not cls._plugins_loaded:
+            cls._plugins_loaded = True
+            cls.classes += tuple(entry_point.load() for entry_point in _plugin_entry_points())
+        return super()._index_next_class()
@@ -47,6 +47,50 @@ class ClientEchoPrimitives:
 
         state_machine.set_variable_value(outputs[0], response)
 
+    @staticmethod
+    @parsing_decorator(input_args=5, output_args=1)
+    def make_tcp_echo_request_reuse(inputs, outputs, state_machine):
+        """
+        Make a TCP echo request over a pooled connection.
+
+        The connection is kept open after the echo and reused by later requests with the
+        same pool key, avoiding a TCP handshake per request. If the server closed the
+        connection in the meantime a new one is opened.
+
+        Number of input arguments: 5
+        Number of output arguments: 1
+        Optional input arguments: No
+        Optional output arguments: No
+
+        Args:
+            inputs (List[str]): The list of input variable names. It contains five mandatory input arguments:
+                - The name of the variable containing the IP address.
+                - The name of the variable containing the port number.
+                - The name of the variable containing the message to be echoed.
+                - The name of the variable containing the timeout duration.
+                - The name of the variable containing the key of the pooled connection.
+            outputs (List[str]): The list of output variable names. It contains one mandatory output argument:
+                - The name of the variable to store the echoed response (or None).
+            state_machine: The state machine object.
+
+        Returns:
+            None
+        """
+        ip = state_machine.get_variable_value(inputs[0])
+        port = int(state_machine.get_variable_value(inputs[1]))
+        message = state_machine.get_variable_value(inputs[2])
+        timeout = float(state_machine.get_variable_value(inputs[3]))
+        pool_key = state_machine.get_variable_value(inputs[4])
+
+        response = utils.send_echo_tcp_pooled(ip, port, message, timeout, pool_key)
+
+        if response is not None:
+            state_machine.trigger_event(EventNames.RESPONSE_RECEIVED.name)
+        else:
+            state_machine.trigger_event(EventNames.REQUEST_ERROR.name)
+
+        state_machine.set_variable_value(outputs[0], response)
+
     @staticmethod
     @parsing_decorator(input_args=4, output_args=1)
     def make_udp_echo_request(inputs, outputs, state_machine):
@@ -84,3 +128,47 @@ class ClientEchoPrimitives:
             state_machine.trigger_event(EventNames.REQUEST_ERROR.name)
 
         state_machine.set_variable_value(outputs[0], response)
+
+    @staticmethod
+    @parsing_decorator(input_args=4, output_args=1)
+    def make_tcp_echo_requests_parallel(inputs, outputs, state_machine):
+        """
+        Make one-shot TCP echo requests to several servers concurrently.
+
+        All connections are multiplexed over a single selector, so the requests take
+        about as long as the slowest server rather than the sum of all of them.
+
+        Number of input arguments: 4
+        Number of output arguments: 1
+        Optional input arguments: No
+        Optional output arguments: No
+
+        Args:
+            inputs (List[str]): The list of input variable names. It contains four mandatory input arguments:
+                - The name of the variable containing the list of IP addresses.
+                - The name of the variable containing the list of port numbers, or a single port used for every IP address.
+                - The name of the variable containing the message to be echoed.
+                - The name of the variable containing the timeout duration.
+            outputs (List[str]): The list of output variable names. It contains one mandatory output argument:
+                - The name of the variable to store the list of echoed responses (None for failed requests).
+            state_machine: The state machine object.
+
+        Returns:
+            None
+        """
+        ips = state_machine.get_variable_value(inputs[0])
+        ports = state_machine.get_variable_value(inputs[1])
+        message = state_machine.get_variable_value(inputs[2])
+        timeout = float(state_machine.get_variable_value(inputs[3]))
+
+        if not isinstance(ports, (list, tuple)):
+            ports = [ports] * len(ips)
+
+        responses = utils.send_echo_many_tcp(list(zip(ips, ports)), message, timeout)
+
+        if any(response is not None for response in responses):
+            state_machine.trigger_event(EventNames.RESPONSE_RECEIVED.name)
+        else:
+            state_machine.trigger_event(EventNames.REQUEST_ERROR.name)
+
+        state_machine.set_variable_value(outputs[0], responses)
@@ -1,8 +1,185 @@
 from scapy.all import IP, UDP, DNS, DNSQR, DNSRR, DNSRROPT
-import random
+import os
 import string
+import struct
 import logging
+import threading
 from nopasaran.decorators import parsing_decorator
+from nopasaran.fast_dns import FastDNS, DNS_ID_OFFSET, encode_qname, decode_qname, is_encoded_qname
+
+
+# Prebuilt packets copied by the creation primitives instead of rebuilding the layers on every call.
+_DNS_TEMPLATE = IP()/UDP()/DNS()
+
+# Claims QDCOUNT=1 but carries no question.
+_QDCOUNT_MISMATCH_TEMPLATE = IP()/UDP()/DNS(qdcount=1, qd=None)
+
+# FastDNS counterpart, serialized once so that copies start with valid lengths and checksums.
+_FAST_QDCOUNT_MISMATCH_TEMPLATE = FastDNS()
+_FAST_QDCOUNT_MISMATCH_TEMPLATE.qdcount = 1
+bytes(_FAST_QDCOUNT_MISMATCH_TEMPLATE)
+
+_DNSQR_TEMPLATE = DNSQR()
+_DNSRR_TEMPLATE = DNSRR()
+
+# Released resource records, reset and handed out again by create_DNS_resource_record.
+_DNSRR_FREELIST = []
+_DNSRR_FREELIST_SIZE = 256
+
+# Characters used for random labels.
+_LABEL_ALPHABET = (string.ascii_lowercase + string.digits).encode('ascii')
+
+# Maps every byte value onto the label alphabet.
+_LABEL_TABLE = bytes(_LABEL_ALPHABET[value % len(_LABEL_ALPHABET)] for value in range(256))
+
+
+class _LabelPool:
+    """
+    Random labels cut from a single large urandom draw, drawn again once all labels are used.
+    """
+
+    def __init__(self, label_length=8, count=8192):
+        """
+        Initialize the pool.
+
+        Args:
+            label_length (int, optional): The length of each label. Defaults to 8.
+            count (int, optional): The number of labels generated per draw. Defaults to 8192.
+        """
+        self.label_length = label_length
+        self.count = count
+        self._lock = threading.Lock()
+        self._labels = b""
+        self._index = count
+
+    def pop(self):
+        """
+        Get a new random label.
+
+        Returns:
+            bytes: The label.
+        """
+        with self._lock:
+            if self._index == self.count:
+                self._labels = os.urandom(self.label_length * self.count).translate(_LABEL_TABLE)
+                self._index = 0
+            start = self._index * self.label_length
+            self._index += 1
+            labels = self._labels
+        return labels[start:start + self.label_length]
+
+
+_LABEL_POOL = _LabelPool()
+
+
+def _dns_layer(dns_packet):
+    """
+    Get the object holding the DNS header fields of a packet.
+
+    The DNS layer of a Scapy packet is cached on the packet, so the layer chain is
+    only walked again if the layer has since been detached from its parent.
+
+    Args:
+        dns_packet: A Scapy packet with a DNS layer, or a FastDNS packet.
+
+    Returns:
+        The DNS layer, or the FastDNS packet itself.
+    """
+    if isinstance(dns_packet, FastDNS):
+        return dns_packet
+    cache = getattr(dns_packet, '__dict__', None)
+    if cache is None:
+        return dns_packet['DNS']
+    dns_layer = cache.get('_dns_layer')
+    if dns_layer is not None and (dns_layer is dns_packet or (dns_layer.underlayer is not None and dns_layer.underlayer.payload is dns_layer)):
+        return dns_layer
+    dns_layer = dns_packet['DNS']
+    # Stored in the instance dict directly, Scapy's __setattr__ would first look for a field of that name in every layer
+    cache['_dns_layer'] = dns_layer
+    return dns_layer
+
+
+def _dns_header_buffer(dns_packet):
+    """
+    Get the raw bytes holding the DNS header of a packet, if it can be read without Scapy.
+
+    This is the buffer of a FastDNS packet, or the payload of a Scapy packet whose DNS
+    message was left undissected in a Raw layer.
+
+    Args:
+        dns_packet: A Scapy packet or a FastDNS packet.
+
+    Returns:
+        tuple or None: The buffer and the offset of the DNS header in it, or None if the fields
+        have to be read from the Scapy DNS layer.
+    """
+    if isinstance(dns_packet, FastDNS):
+        return dns_packet.buf, DNS_ID_OFFSET
+    if hasattr(dns_packet, 'haslayer') and not dns_packet.haslayer(DNS) and dns_packet.haslayer('Raw'):
+        return dns_packet['Raw'].load, 0
+    return None
+
+
+def _reset_resource_record(record):
+    """
+    Reset a released resource record to the state of a newly created one.
+
+    Args:
+        record (DNSRR): The resource record.
+    """
+    record.fields.clear()
+    record.remove_payload()
+    record.remove_underlayer(None)
+    record.raw_packet_cache = None
+    record.explicit = 0
+
+
+def _append_random_label(dns_packet, in_place):
+    """
+    Prepend a random label to the qname of a DNS query packet.
+
+    Args:
+        dns_packet: A Scapy packet or a FastDNS packet.
+        in_place (bool): Whether the packet may be modified instead of copied.
+
+    Returns:
+        The modified packet, unchanged if it has no question.
+    """
+    if not in_place:
+        # Copy the packet so we don't mutate the original in place:
+        dns_packet = dns_packet.copy()
+
+    if isinstance(dns_packet, FastDNS):
+        question = dns_packet.qd
+    elif dns_packet.haslayer(DNSQR):
+        question = dns_packet[DNSQR]
+        if in_place and dns_packet.haslayer(DNS):
+            # The packet is overwritten anyway, only the question may be shared
+            # with another variable so clone that layer alone
+            dns_layer = dns_packet[DNS]
+            question = question.copy()
+            if isinstance(dns_layer.qd, list):
+                dns_layer.qd = [question] + dns_layer.qd[1:]
+            else:
+                dns_layer.qd = question
+        elif in_place:
+            # A bare question (e.g. from create_DNS_query) has no DNS layer to relink
+            # a clone into, so it is copied as a whole
+            dns_packet = dns_packet.copy()
+            question = dns_packet[DNSQR]
+    else:
+        question = None
+    if question is None:
+        return dns_packet
+
+    rand_label = _LABEL_POOL.pop()
+    # Only the random label is encoded per call, the encoded suffix is cached
+    suffix = encode_qname(question.qname)
+    if is_encoded_qname(suffix):
+        question.qname = bytes((len(rand_label),)) + rand_label + suffix
+    else:
+        question.qname = rand_label + b"." + suffix.rstrip(b".")
+    return dns_packet
 
 
 class DNSPrimitives:
@@ -34,9 +211,71 @@ class DNSPrimitives:
         Returns:
             None
         """
-        dns_packet = IP()/UDP()/DNS()
+        dns_packet = _DNS_TEMPLATE.copy()
+        state_machine.set_variable_value(outputs[0], dns_packet)
+
+    @staticmethod
+    @parsing_decorator(input_args=0, output_args=1)
+    def create_fast_DNS_packet(inputs, outputs, state_machine):
+        """
+        Create a DNS query packet backed by a flat byte buffer and store it in an output variable in the machine's state.
+
+        The packet has the same defaults as the one created by `create_DNS_packet`, but it is a FastDNS
+        object whose fields are patched in place instead of going through Scapy. The DNS primitives
+        accept it both as the packet and as its query; it can be converted with `to_scapy()`.
+
+        Number of input arguments: 0
+
+        Number of output arguments: 1
+
+        Optional input arguments: No
+
+        Optional output arguments: No
+
+        Args:
+            inputs (List[str]): The list of input variable names.
+
+            outputs (List[str]): The list of output variable names. It contains one mandatory output argument, which is the name of the variable to store the created DNS packet.
+            
+            state_machine: The state machine object.
+
+        Returns:
+            None
+        """
+        dns_packet = FastDNS()
         state_machine.set_variable_value(outputs[0], dns_packet)
 
+    @staticmethod
+    @parsing_decorator(input_args=1, output_args=1)
+    def create_DNS_packets_batch(inputs, outputs, state_machine):
+        """
+        Create a list of FastDNS query packets and store it in an output variable in the machine's state.
+
+        Creating the packets in one call amortizes the parsing and variable handling of the
+        primitive over the whole batch. See `create_fast_DNS_packet` for the packets created.
+
+        Number of input arguments: 1
+
+        Number of output arguments: 1
+
+        Optional input arguments: No
+
+        Optional output arguments: No
+
+        Args:
+            inputs (List[str]): The list of input variable names. It contains one mandatory input argument, which is the name of the variable containing the number of packets to create.
+
+            outputs (List[str]): The list of output variable names. It contains one mandatory output argument, which is the name of the variable to store the list of created DNS packets.
+            
+            state_machine: The state machine object.
+
+        Returns:
+            None
+        """
+        count = int(state_machine.get_variable_value(inputs[0]))
+        dns_packets = [FastDNS() for _ in range(count)]
+        state_machine.set_variable_value(outputs[0], dns_packets)
+
     @staticmethod
     @parsing_decorator(input_args=1, output_args=1)
     def disable_DNS_rd_flag(inputs, outputs, state_machine):
@@ -62,8 +301,9 @@ class DNSPrimitives:
             None
         """
         dns_packet = state_machine.get_variable_value(inputs[0])
-        dns_packet['DNS'].rd = 0
-        state_machine.set_variable_value(outputs[0], dns_packet)
+        _dns_layer(dns_packet).rd = 0
+        if outputs[0] != inputs[0]:
+            state_machine.set_variable_value(outputs[0], dns_packet)
 
     @staticmethod
     @parsing_decorator(input_args=1, output_args=1)
@@ -90,8 +330,9 @@ class DNSPrimitives:
             None
         """
         dns_packet = state_machine.get_variable_value(inputs[0])
-        dns_packet['DNS'].rd = 1
-        state_machine.set_variable_value(outputs[0], dns_packet)
+        _dns_layer(dns_packet).rd = 1
+        if outputs[0] != inputs[0]:
+            state_machine.set_variable_value(outputs[0], dns_packet)
 
     @staticmethod
     @parsing_decorator(input_args=1, output_args=1)
@@ -120,8 +361,9 @@ class DNSPrimitives:
             None
         """
         dns_packet = state_machine.get_variable_value(inputs[0])
-        dns_packet['DNS'].qr = 0
-        state_machine.set_variable_value(outputs[0], dns_packet)
+        _dns_layer(dns_packet).qr = 0
+        if outputs[0] != inputs[0]:
+            state_machine.set_variable_value(outputs[0], dns_packet)
 
 
     @staticmethod
@@ -151,8 +393,9 @@ class DNSPrimitives:
             None
         """
         dns_packet = state_machine.get_variable_value(inputs[0])
-        dns_packet['DNS'].qr = 1
-        state_machine.set_variable_value(outputs[0], dns_packet)
+        _dns_layer(dns_packet).qr = 1
+        if outputs[0] != inputs[0]:
+            state_machine.set_variable_value(outputs[0], dns_packet)
 
     @staticmethod
     @parsing_decorator(input_args=1, output_args=1)
@@ -161,22 +404,22 @@ class DNSPrimitives:
         Get the transaction ID from the DNS packet.
         """
         dns_packet = state_machine.get_variable_value(inputs[0])
-        dns_layer = None
-
-        # Try to get the DNS layer directly
-        if hasattr(dns_packet, 'haslayer') and dns_packet.haslayer(DNS):
-            dns_layer = dns_packet.getlayer(DNS)
-
-        # If no DNS layer, try to decode from Raw
-        elif hasattr(dns_packet, 'haslayer') and dns_packet.haslayer('Raw'):
-            try:
-                dns_layer = DNS(dns_packet['Raw'].load)
-            except Exception as e:
-                logging.error(f"[Parsing] Failed to decode Raw payload as DNS: {e}")
-
-        # Extract transaction ID if DNS layer is found
-        if dns_layer:
-            transaction_id = dns_layer.id
+        transaction_id = None
+
+        # Read the ID straight from the raw header (FastDNS buffer or undissected Raw payload)
+        header = _dns_header_buffer(dns_packet)
+        if header is not None:
+            buf, offset = header
+            if len(buf) >= offset + 2:
+                transaction_id = struct.unpack_from("!H", buf, offset)[0]
+            else:
+                logging.error("[Parsing] Failed to decode Raw payload as DNS: payload too short")
+
+        # Otherwise use the DNS layer
+        elif hasattr(dns_packet, 'haslayer') and dns_packet.haslayer(DNS):
+            transaction_id = _dns_layer(dns_packet).id
+
+        if transaction_id is not None:
             state_machine.set_variable_value(outputs[0], transaction_id)
         else:
             logging.error("[Parsing] DNS layer not found in packet")
@@ -208,8 +451,9 @@ class DNSPrimitives:
         """
         dns_packet = state_machine.get_variable_value(inputs[0])
         new_transaction_id = state_machine.get_variable_value(inputs[1])
-        dns_packet['DNS'].id = new_transaction_id
-        state_machine.set_variable_value(outputs[0], dns_packet)
+        _dns_layer(dns_packet).id = new_transaction_id
+        if outputs[0] != inputs[0]:
+            state_machine.set_variable_value(outputs[0], dns_packet)
 
     @staticmethod
     @parsing_decorator(input_args=0, output_args=1)
@@ -235,7 +479,7 @@ class DNSPrimitives:
         Returns:
             None
         """
-        dns_query = DNSQR()
+        dns_query = _DNSQR_TEMPLATE.copy()
         state_machine.set_variable_value(outputs[0], dns_query)
 
     @staticmethod
@@ -267,9 +511,10 @@ class DNSPrimitives:
         dns_packet = state_machine.get_variable_value(inputs[0])
         dns_query = state_machine.get_variable_value(inputs[1])
 
-        dns_packet['DNS'].qd = dns_query
+        _dns_layer(dns_packet).qd = dns_query
 
-        state_machine.set_variable_value(outputs[0], dns_packet)
+        if outputs[0] != inputs[0]:
+            state_machine.set_variable_value(outputs[0], dns_packet)
 
     @staticmethod
     @parsing_decorator(input_args=1, output_args=1)
@@ -326,8 +571,13 @@ class DNSPrimitives:
         """
         dns_query = state_machine.get_variable_value(inputs[0])
         new_query_name = state_machine.get_variable_value(inputs[1])
+        if isinstance(new_query_name, str):
+            new_query_name = new_query_name.encode()
+        if isinstance(new_query_name, bytes) and new_query_name and not isinstance(dns_query, FastDNS):
+            new_query_name = encode_qname(new_query_name)
         dns_query.qname = new_query_name
-        state_machine.set_variable_value(outputs[0], dns_query)
+        if outputs[0] != inputs[0]:
+            state_machine.set_variable_value(outputs[0], dns_query)
 
     @staticmethod
     @parsing_decorator(input_args=1, output_args=1)
@@ -346,7 +596,39 @@ class DNSPrimitives:
         Args:
             inputs (List[str]): The list of input variable names. It contains one mandatory input argument, which is the name of the variable containing the DNS query.
 
-            outputs (List[str]): The list of output variable names. It contains one mandatory output argument, which is the name of the variable to store the qualified domain name.
+            outputs (List[str]): The list of output variable names. It contains one mandatory output argument, which is the name of the variable to store the qualified domain name, or None if the packet has no question.
+
+            state_machine: The state machine object.
+
+        Returns:
+            None
+        """
+        dns_query = state_machine.get_variable_value(inputs[0])
+        qname = dns_query.qname
+        if qname is not None:
+            # A packet without a question, e.g. with a QDCOUNT mismatch, has no qname
+            qname = decode_qname(qname).decode()
+
+        state_machine.set_variable_value(outputs[0], qname)
+
+    @staticmethod
+    @parsing_decorator(input_args=1, output_args=1)
+    def get_query_name_bytes(inputs, outputs, state_machine):
+        """
+        Get the domain name (qname) of a DNS query (DNSQR) as bytes, without decoding it to a string.
+
+        Number of input arguments: 1
+
+        Number of output arguments: 1
+
+        Optional input arguments: No
+
+        Optional output arguments: No
+
+        Args:
+            inputs (List[str]): The list of input variable names. It contains one mandatory input argument, which is the name of the variable containing the DNS query.
+
+            outputs (List[str]): The list of output variable names. It contains one mandatory output argument, which is the name of the variable to store the qualified domain name, or None if the packet has no question.
 
             state_machine: The state machine object.
 
@@ -354,7 +636,9 @@ class DNSPrimitives:
             None
         """
         dns_query = state_machine.get_variable_value(inputs[0])
-        qname = dns_query.qname.decode()
+        qname = dns_query.qname
+        if qname is not None:
+            qname = decode_qname(qname)
 
         state_machine.set_variable_value(outputs[0], qname)
 
@@ -387,7 +671,8 @@ class DNSPrimitives:
         dns_query = state_machine.get_variable_value(inputs[0])
         new_query_type = state_machine.get_variable_value(inputs[1])
         dns_query.qtype = int(new_query_type)
-        state_machine.set_variable_value(outputs[0], dns_query)
+        if outputs[0] != inputs[0]:
+            state_machine.set_variable_value(outputs[0], dns_query)
 
     @staticmethod
     @parsing_decorator(input_args=2, output_args=1)
@@ -417,8 +702,11 @@ class DNSPrimitives:
         """
         dns_query = state_machine.get_variable_value(inputs[0])
         new_query_class = state_machine.get_variable_value(inputs[1])
+        if isinstance(dns_query, FastDNS):
+            new_query_class = int(new_query_class)
         dns_query.qclass = new_query_class
-        state_machine.set_variable_value(outputs[0], dns_query)
+        if outputs[0] != inputs[0]:
+            state_machine.set_variable_value(outputs[0], dns_query)
 
     @staticmethod
     @parsing_decorator(input_args=0, output_args=1)
@@ -445,9 +733,45 @@ class DNSPrimitives:
         Returns:
             None
         """
-        dns_resource_record = DNSRR()
+        dns_resource_record = _DNSRR_FREELIST.pop() if _DNSRR_FREELIST else _DNSRR_TEMPLATE.copy()
         state_machine.set_variable_value(outputs[0], dns_resource_record)
 
+    @staticmethod
+    @parsing_decorator(input_args=1, output_args=0)
+    def release_DNS_resource_record(inputs, outputs, state_machine):
+        """
+        Release a DNS resource record that is no longer used, so that create_DNS_resource_record can reuse it.
+
+        The record is reset to its defaults and the variable holding it is set to None. A record
+        still attached to a packet, e.g. by add_DNS_response_to_answer, is left untouched and
+        not reused, so the packet holding it stays valid.
+
+        Number of input arguments: 1
+
+        Number of output arguments: 0
+
+        Optional input arguments: No
+
+        Optional output arguments: No
+
+        Args:
+            inputs (List[str]): The list of input variable names. It contains one mandatory input argument, which is
+                the name of the variable containing the DNS resource record.
+
+            outputs (List[str]): The list of output variable names. Not used in this method.
+
+            state_machine: The state machine object.
+
+        Returns:
+            None
+        """
+        dns_resource_record = state_machine.get_variable_value(inputs[0])
+        state_machine.set_variable_value(inputs[0], None)
+        if (isinstance(dns_resource_record, DNSRR) and getattr(dns_resource_record, 'parent', None) is None
+                and len(_DNSRR_FREELIST) < _DNSRR_FREELIST_SIZE):
+            _reset_resource_record(dns_resource_record)
+            _DNSRR_FREELIST.append(dns_resource_record)
+
     @staticmethod
     @parsing_decorator(input_args=2, output_args=1)
     def set_DNS_resource_record_domain(inputs, outputs, state_machine):
@@ -480,7 +804,8 @@ class DNSPrimitives:
 
         dns_resource_record.rrname = domain_name
 
-        state_machine.set_variable_value(outputs[0], dns_resource_record)
+        if outputs[0] != inputs[0]:
+            state_machine.set_variable_value(outputs[0], dns_resource_record)
 
     @staticmethod
     @parsing_decorator(input_args=2, output_args=1)
@@ -514,7 +839,8 @@ class DNSPrimitives:
 
         dns_resource_record.rdata = value
 
-        state_machine.set_variable_value(outputs[0], dns_resource_record)
+        if outputs[0] != inputs[0]:
+            state_machine.set_variable_value(outputs[0], dns_resource_record)
 
     @staticmethod
     @parsing_decorator(input_args=2, output_args=1)
@@ -548,7 +874,8 @@ class DNSPrimitives:
 
         dns_resource_record.type = record_type
 
-        state_machine.set_variable_value(outputs[0], dns_resource_record)
+        if outputs[0] != inputs[0]:
+            state_machine.set_variable_value(outputs[0], dns_resource_record)
 
     @staticmethod
     @parsing_decorator(input_args=2, output_args=1)
@@ -580,9 +907,10 @@ class DNSPrimitives:
         dns_packet = state_machine.get_variable_value(inputs[0])
         response_packet = state_machine.get_variable_value(inputs[1])
 
-        dns_packet['DNS'].an = response_packet
+        _dns_layer(dns_packet).an = response_packet
 
-        state_machine.set_variable_value(outputs[0], dns_packet)
+        if outputs[0] != inputs[0]:
+            state_machine.set_variable_value(outputs[0], dns_packet)
 
     @staticmethod
     @parsing_decorator(input_args=1, output_args=1)
@@ -644,9 +972,10 @@ class DNSPrimitives:
         dns_packet = state_machine.get_variable_value(inputs[0])
         additional_response = state_machine.get_variable_value(inputs[1])
 
-        dns_packet['DNS'].ar = additional_response
+        _dns_layer(dns_packet).ar = additional_response
 
-        state_machine.set_variable_value(outputs[0], dns_packet)
+        if outputs[0] != inputs[0]:
+            state_machine.set_variable_value(outputs[0], dns_packet)
 
     @staticmethod
     @parsing_decorator(input_args=1, output_args=1)
@@ -700,20 +1029,32 @@ class DNSPrimitives:
      
         
         dns_packet = state_machine.get_variable_value(inputs[0])
+        dns_packet = _append_random_label(dns_packet, in_place=inputs[0] == outputs[0])
+        state_machine.set_variable_value(outputs[0], dns_packet)
 
-        # Copy the packet so we don't mutate the original in place:
-        dns_packet = dns_packet.copy()
+    @staticmethod
+    @parsing_decorator(input_args=1, output_args=1)
+    def append_random_label_to_qname_batch(inputs, outputs, state_machine):
+        """
+        Append a random label to the existing qname of every DNS query packet in a list.
 
-        if not dns_packet.haslayer(DNSQR):
-            state_machine.set_variable_value(outputs[0], dns_packet)
-            return
+        Number of input arguments: 1
+        - The name of the variable containing the list of DNS packets.
 
-        original_qname = dns_packet[DNSQR].qname.decode().rstrip('.')
-        rand_label = ''.join(random.choice(string.ascii_lowercase + string.digits) for _ in range(8))
-        new_qname = f"{rand_label}.{original_qname}"
+        Number of output arguments: 1
+        - The name of the variable to store the list of modified DNS packets.
 
-        dns_packet[DNSQR].qname = new_qname.encode()
-        state_machine.set_variable_value(outputs[0], dns_packet)
+        Args:
+            inputs (List[str]): The list of input variable names, containing one mandatory argument:
+                - The variable name of the list of DNS query packets.
+            outputs (List[str]): The list of output variable names, containing one mandatory argument:
+                - The variable name of the list of modified DNS packets.
+            state_machine: The state machine object.
+        """
+        dns_packets = state_machine.get_variable_value(inputs[0])
+        in_place = inputs[0] == outputs[0]
+        dns_packets = [_append_random_label(dns_packet, in_place) for dns_packet in dns_packets]
+        state_machine.set_variable_value(outputs[0], dns_packets)
 
 
     @staticmethod
@@ -738,8 +1079,17 @@ class DNSPrimitives:
         # Get the DNS packet from the state machine
         dns_packet = state_machine.get_variable_value(inputs[0])
         
-        # Extract the DNS response code (0 = NoError, 3 = NXDOMAIN, etc.)
-        dns_rcode = dns_packet.rcode
+        # Extract the DNS response code (0 = NoError, 3 = NXDOMAIN, etc.), from the raw header when there is one
+        header = _dns_header_buffer(dns_packet)
+        if header is not None:
+            buf, offset = header
+            if len(buf) >= offset + 4:
+                dns_rcode = buf[offset + 3] & 0x0F
+            else:
+                logging.error("[Parsing] Failed to decode Raw payload as DNS: payload too short")
+                dns_rcode = None
+        else:
+            dns_rcode = _dns_layer(dns_packet).rcode
         
         # Store the rcode in the specified output variable
         state_machine.set_variable_value(outputs[0], dns_rcode)
@@ -764,15 +1114,37 @@ class DNSPrimitives:
             Returns:
                 None
             """
-            # Create a baseline IP/UDP/DNS packet
-            dns_packet = IP()/UDP()/DNS()
+            # Copy the baseline IP/UDP/DNS packet claiming QDCOUNT=1
+            # ...but with NO DNSQR object attached, so it's inconsistent and malformed
+            dns_packet = _QDCOUNT_MISMATCH_TEMPLATE.copy()
 
-            dns_packet[DNS].qdcount = 1
+            # Store the malformed DNS packet in the state machine
+            state_machine.set_variable_value(outputs[0], dns_packet)
 
-            # ...but DO NOT actually attach a DNSQR object, so it's inconsistent and malformed
-            dns_packet[DNS].qd = None
+    @staticmethod
+    @parsing_decorator(input_args=0, output_args=1)
+    def create_fast_dns_query_packet_with_qdcount_mismatch(inputs, outputs, state_machine):
+            """
+            Create a malformed FastDNS packet (claims QDCOUNT=1 but provides no question).
 
-            # Store the malformed DNS packet in the state machine
+            The packet is copied from a pre-serialized template, which is much cheaper than building
+            Scapy layers when generating many fuzzing packets. See `create_fast_DNS_packet`.
+            
+            Number of input arguments: 0
+            Number of output arguments: 1
+            Optional input arguments: No
+            Optional output arguments: No
+
+            Args:
+                inputs (List[str]): The list of input variable names. Not used in this method.
+                outputs (List[str]): The list of output variable names. Contains one mandatory output argument:
+                    - The name of the variable to store the malformed DNS packet.
+                state_machine: The state machine object.
+
+            Returns:
+                None
+            """
+            dns_packet = _FAST_QDCOUNT_MISMATCH_TEMPLATE.copy()
             state_machine.set_variable_value(outputs[0], dns_packet)
     
     @staticmethod
@@ -809,7 +1181,7 @@ class DNSPrimitives:
             if getattr(dns_layer, "qdcount", 0) > 0 and getattr(dns_layer, "qd", None):
                 try:
                     formatted_query["questions"].append({
-                        "qname": dns_layer.qd.qname.decode() if isinstance(dns_layer.qd.qname, bytes) else dns_layer.qd.qname,
+                        "qname": decode_qname(dns_layer.qd.qname).decode() if isinstance(dns_layer.qd.qname, bytes) else dns_layer.qd.qname,
                         "qtype": dns_layer.qd.qtype,
                         "qclass": dns_layer.qd.qclass
                     })
@@ -869,7 +1241,7 @@ class DNSPrimitives:
                 if getattr(dns_layer, "qdcount", 0) > 0 and getattr(dns_layer, "qd", None):
                     question = dns_layer.qd
                     formatted_response["questions"].append({
-                        "qname": question.qname.decode() if isinstance(question.qname, bytes) else question.qname,
+                        "qname": decode_qname(question.qname).decode() if isinstance(question.qname, bytes) else question.qname,
                         "qtype": question.qtype,
                         "qtype_name": dnsatypes.get(question.qtype, f"Unknown({question.qtype})"),
                         "qclass": question.qclass
@@ -5,4 +5,5 @@ class ConditionPrimitives(Primitives):
     """
     Class containing condition primitives for the state machine.
     """
-    classes = [VariableComparisons]
+    __slots__ = ()
+    classes = (VariableComparisons,)
@@ -1,12 +1,136 @@
+import importlib
+import sys
+import threading
+from functools import lru_cache
+
+
+_registry_lock = threading.RLock()
+
+
+@lru_cache(maxsize=None)
+def _load_class(module_name, class_name):
+    """
+    Resolve a primitive class referenced by name.
+
+    Args:
+        module_name (str): The module the name is resolved against.
+        class_name (str): The name of the primitive class.
+
+    Returns:
+        type: The primitive class.
+    """
+    return getattr(importlib.import_module(module_name), class_name)
+
+
 class Primitives:
     """
     Generic class containing primitives for the state machine.
     """
+    __slots__ = ()
 
     @classmethod
-    def __getattr__(cls, name):
+    def iter_classes(cls):
+        """
+        Iterate over the primitive classes, importing lazily referenced ones on demand.
+
+        Entries of `classes` may be class objects or class names; names are resolved
+        against the module defining the subclass.
+
+        Yields:
+            type: Each primitive class, in declaration order.
+        """
         for class_ in cls.classes:
-            if hasattr(class_, name):
-                method = getattr(class_, name)
-                return method
-        raise AttributeError(f"{cls.__name__} has no attribute '{name}'")
+            yield cls._resolve_class(class_)
+
+    @classmethod
+    def _resolve_class(cls, class_):
+        if isinstance(class_, str):
+            return _load_class(cls.__module__, class_)
+        return class_
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._registry = {}
+        cls._indexed = 0
+
+    @classmethod
+    def _index_next_class(cls):
+        """
+        Add the public callables of the next unindexed primitive class to the registry.
+
+        Classes are indexed in declaration order and earlier classes take precedence,
+        so only the modules needed to find a primitive are imported. Each new primitive
+        is also copied onto the class itself, flattening the primitive classes into a
+        single namespace so later attribute lookups resolve through the type dict
+        without going through `__getattr__`.
+
+        Returns:
+            bool: False if every class has already been indexed, True otherwise.
+        """
+        if cls._indexed >= len(cls.classes):
+            return False
+        class_ = cls._resolve_class(cls.classes[cls._indexed])
+        for name in vars(class_):
+            if not name.startswith('_'):
+                attribute = getattr(class_, name)
+                if callable(attribute) and name not in cls._registry:
+                    cls._registry[sys.intern(name)] = attribute
+                    if not hasattr(cls, name):
+                        setattr(cls, name, staticmethod(attribute))
+        cls._indexed += 1
+        return True
+
+    @classmethod
+    def _build_registry(cls):
+        """
+        Index every primitive class.
+
+        Returns:
+            dict: The mapping of primitive names to their callables.
+        """
+        with _registry_lock:
+            while cls._index_next_class():
+                pass
+        return cls._registry
+
+    @classmethod
+    def lookup(cls, name):
+        """
+        Get the callable implementing a primitive.
+
+        Args:
+            name (str): The name of the primitive.
+
+        Returns:
+            Callable: The primitive.
+
+        Raises:
+            AttributeError: If no primitive class defines the name.
+        """
+        registry = cls._registry
+        if name not in registry:
+            with _registry_lock:
+                while name not in registry:
+                    if not cls._index_next_class():
+                        raise AttributeError(f"{cls.__name__} has no attribute '{name}'")
+        return registry[name]
+
+    @classmethod
+    def dispatch(cls, name, *args):
+        """
+        Call a primitive by name.
+
+        Args:
+            name (str): The name of the primitive.
+            *args: The arguments passed to the primitive.
+
+        Returns:
+            The result of the primitive.
+        """
+        return cls.lookup(name)(*args)
+
+    @classmethod
+    def __getattr__(cls, name):
+        if name.startswith('_'):
+            raise AttributeError(f"{cls.__name__} has no attribute '{name}'")
+        return cls.lookup(name)
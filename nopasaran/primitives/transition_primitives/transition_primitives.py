@@ -5,4 +5,5 @@ class TransitionPrimitives(Primitives):
     """
     Class containing transition primitives for the state machine.
     """
-    classes = [VariableAssignmentTransitions]
+    __slots__ = ()
+    classes = (VariableAssignmentTransitions,)
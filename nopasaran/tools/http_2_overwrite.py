@@ -1,9 +1,11 @@
+import collections
 import struct
+from functools import lru_cache
 from typing import Iterable
 from hpack import Decoder, Encoder
 from h2.errors import ErrorCodes
 from h2.events import PriorityUpdated, StreamReset, WindowUpdated, DataReceived
-from h2.exceptions import FlowControlError, FrameDataMissingError, NoSuchStreamError, ProtocolError, StreamClosedError
+from h2.exceptions import FlowControlError, FrameDataMissingError, NoSuchStreamError, ProtocolError, StreamClosedError, StreamIDTooLowError
 from h2.frame_buffer import CONTINUATION_BACKLOG, FrameBuffer
 from h2.settings import Settings, SettingCodes
 from h2 import settings
@@ -13,7 +15,7 @@ from h2.stream import H2Stream, StreamClosedBy, StreamInputs
 from hyperframe.frame import (Frame, RstStreamFrame, HeadersFrame, PushPromiseFrame, SettingsFrame, 
                               DataFrame, WindowUpdateFrame, PingFrame, RstStreamFrame, 
                               PriorityFrame, GoAwayFrame, ContinuationFrame, AltSvcFrame, 
-                              ExtensionFrame, _STRUCT_HL, _STRUCT_L)
+                              ExtensionFrame, Padding, _STRUCT_HBBBL, _STRUCT_HL)
 from hyperframe.exceptions import InvalidFrameError, InvalidDataError, InvalidPaddingError
 from hyperframe.flags import Flags
 from h2.utilities import SizeLimitDict
@@ -33,6 +35,19 @@ def new_validate_setting(setting, value):  # noqa: C901
 
     return 0
 
+def new_settings_setitem(self, key, value):
+    """
+    Store a new value for a setting. Settings are never validated (see
+    new_validate_setting), so the validation call is skipped entirely.
+    """
+    try:
+        items = self._settings[key]
+    except KeyError:
+        items = collections.deque([None])
+        self._settings[key] = items
+
+    items.append(value)
+
 def H2Configuration__init__(self,
                 client_side=True,
                 header_encoding=None,
@@ -133,8 +148,8 @@ def H2Connection__init__modified(self, config=None):
     # until completion.
     self._header_frames = []
 
-    # Data that needs to be sent.
-    self._data_to_send = bytearray()
+    # Data that needs to be sent, as a queue of serialized chunks joined once in data_to_send.
+    self._data_to_send = collections.deque()
 
     # Keeps track of how streams are closed.
     self._closed_streams = SizeLimitDict(
@@ -146,21 +161,116 @@ def H2Connection__init__modified(self, config=None):
         max_window_size=self.local_settings.initial_window_size
     )
 
-    # When in doubt use dict-dispatch.
-    self._frame_dispatch_table = {
-        HeadersFrame: self._receive_headers_frame,
-        PushPromiseFrame: self._receive_push_promise_frame,
-        SettingsFrame: self._receive_settings_frame,
-        DataFrame: self._receive_data_frame,
-        WindowUpdateFrame: self._receive_window_update_frame,
-        PingFrame: self._receive_ping_frame,
-        RstStreamFrame: self._receive_rst_stream_frame,
-        PriorityFrame: self._receive_priority_frame,
-        GoAwayFrame: self._receive_goaway_frame,
-        ContinuationFrame: self._receive_naked_continuation,
-        AltSvcFrame: self._receive_alt_svc_frame,
-        ExtensionFrame: self._receive_unknown_frame
-    }
+    # The frame dispatch table is shared by all connections, see _FRAME_DISPATCH_TABLE.
+
+@lru_cache(maxsize=64)
+def _initial_settings_bytes(settings_items, preamble):
+    """
+    Serialize the connection preamble followed by the initial SETTINGS frame. Connections
+    almost always start with the same settings, so the frame is only built once for them.
+    """
+    f = SettingsFrame(0)
+    for setting, value in settings_items:
+        f.settings[setting] = value
+    return preamble + f.serialize()
+
+# Handler of each received frame type. The handlers are looked up on the class once all
+# the methods above are patched in, and called with the connection as first argument,
+# so connections do not have to build a table of bound methods each.
+_FRAME_DISPATCH_HANDLERS = {
+    HeadersFrame: '_receive_headers_frame',
+    PushPromiseFrame: '_receive_push_promise_frame',
+    SettingsFrame: '_receive_settings_frame',
+    DataFrame: '_receive_data_frame',
+    WindowUpdateFrame: '_receive_window_update_frame',
+    PingFrame: '_receive_ping_frame',
+    RstStreamFrame: '_receive_rst_stream_frame',
+    PriorityFrame: '_receive_priority_frame',
+    GoAwayFrame: '_receive_goaway_frame',
+    ContinuationFrame: '_receive_naked_continuation',
+    AltSvcFrame: '_receive_alt_svc_frame',
+    ExtensionFrame: '_receive_unknown_frame'
+}
+
+def new_receive_frame(self, frame):
+    """
+    Handle a frame received on the connection, dispatching through the shared
+    class-level frame dispatch table.
+    """
+    # Formatted lazily, repr() would build the flags of every frame even when tracing is off
+    self.config.logger.trace("Received frame: %r", frame)
+    try:
+        # When in doubt use dict-dispatch.
+        frames, events = self._frame_dispatch_table[frame.__class__](self, frame)
+    except StreamClosedError as e:
+        # If the stream was closed by RST_STREAM, we just send a RST_STREAM
+        # to the remote peer. Otherwise, this is a connection error, and so
+        # we will re-raise to trigger one.
+        if self._stream_is_closed_by_reset(e.stream_id):
+            f = RstStreamFrame(e.stream_id)
+            f.error_code = e.error_code
+            self._prepare_for_sending([f])
+            events = e._events
+        else:
+            raise
+    except StreamIDTooLowError as e:
+        # The stream ID seems invalid. This may happen when the closed
+        # stream has been cleaned up, or when the remote peer has opened a
+        # new stream with a higher stream ID than this one, forcing it
+        # closed implicitly.
+        #
+        # Check how the stream was closed: depending on the mechanism, it
+        # is either a stream error or a connection error.
+        if self._stream_is_closed_by_reset(e.stream_id):
+            # Closed by RST_STREAM is a stream error.
+            f = RstStreamFrame(e.stream_id)
+            f.error_code = ErrorCodes.STREAM_CLOSED
+            self._prepare_for_sending([f])
+            events = []
+        elif self._stream_is_closed_by_end(e.stream_id):
+            # Closed by END_STREAM is a connection error.
+            raise StreamClosedError(e.stream_id)
+        else:
+            # Closed implicitly, also a connection error, but of type
+            # PROTOCOL_ERROR.
+            raise
+    else:
+        self._prepare_for_sending(frames)
+
+    return events
+
+def new_receive_data(self, data):
+    """
+    Pass some received HTTP/2 data to the connection for handling.
+
+    The frames are parsed and handled in a single loop by FrameBuffer.consume_all
+    instead of going through the iterator protocol once per frame.
+
+    :param data: The data received from the remote peer on the network.
+    :returns: A list of events that the remote peer triggered by sending
+        this data.
+    """
+    self.config.logger.trace(
+        "Process received data on connection. Received data: %r", data
+    )
+
+    self.incoming_buffer.add_data(data)
+    self.incoming_buffer.max_frame_size = self.max_inbound_frame_size
+
+    try:
+        frame_events = self.incoming_buffer.consume_all(self._receive_frame)
+    except InvalidPaddingError:
+        self._terminate_connection(ErrorCodes.PROTOCOL_ERROR)
+        raise ProtocolError("Received frame with invalid padding.")
+    except ProtocolError as e:
+        # For whatever reason, receiving the frame caused a protocol error.
+        # We should prepare to emit a GoAway frame before throwing the
+        # exception up further. No need for an event: the exception will
+        # do fine.
+        self._terminate_connection(e.error_code)
+        raise
+
+    return [event for events in frame_events for event in events]
 
 def new_initiate_connection(self):
     """
@@ -186,12 +296,48 @@ def new_initiate_connection(self):
 
     # Only send SETTINGS frame if we're not skipping it
     if not self.config.skip_initial_settings:
-        f = SettingsFrame(0)
-        for setting, value in self.local_settings.items():
-            f.settings[setting] = value
-        self._data_to_send += preamble + f.serialize()
-    else:
-        self._data_to_send += preamble
+        self._data_to_send.append(_initial_settings_bytes(tuple(self.local_settings.items()), preamble))
+    elif preamble:
+        self._data_to_send.append(preamble)
+
+def new_prepare_for_sending(self, frames):
+    if not frames:
+        return
+    self._data_to_send.extend(f.serialize() for f in frames)
+    assert all(f.body_len <= self.max_outbound_frame_size for f in frames)
+
+def new_data_to_send(self, amount=None):
+    """
+    Returns some data for sending out of the internal data buffer.
+
+    The pending chunks are joined in a single copy, instead of being appended
+    to a bytearray as they are queued and copied again into the returned bytes.
+
+    :param amount: (optional) The maximum amount of data to return. If not
+        set, or set to ``None``, will return as much data as possible.
+    :returns: A bytestring containing the data to send on the wire.
+    """
+    chunks = self._data_to_send
+    if amount is None:
+        self._data_to_send = collections.deque()
+        return b''.join(chunks)
+
+    taken = []
+    while chunks and amount > 0:
+        chunk = chunks.popleft()
+        if len(chunk) > amount:
+            chunks.appendleft(chunk[amount:])
+            chunk = chunk[:amount]
+        taken.append(chunk)
+        amount -= len(chunk)
+    return b''.join(taken)
+
+def new_clear_outbound_data_buffer(self):
+    """
+    Clears the outbound data buffer, such that an immediately following call
+    to data_to_send would return no data.
+    """
+    self._data_to_send = collections.deque()
 
 def new_begin_new_stream(self, stream_id, allowed_ids):
     """
@@ -244,16 +390,14 @@ def new_receive_push_promise_frame(self, frame):
         # Process as headers frame
         return self._receive_headers_frame(headers_frame)
 
-    # Original PUSH_PROMISE handling for clients
+    # Original PUSH_PROMISE handling for clients. The header block is decoded even if
+    # the push is refused below: decoding updates the HPACK dynamic table shared by
+    # the whole connection, so skipping it would corrupt every later header block.
     pushed_headers = _decode_headers(self.decoder, frame.data)
     events = []
 
-    try:
-        if frame.stream_id == 0:
-            stream = self._get_stream_by_id(1)
-        else:
-            stream = self._get_stream_by_id(frame.stream_id)
-    except NoSuchStreamError:
+    stream = self.streams.get(frame.stream_id or 1)
+    if stream is None:
         if (self._stream_closed_by(frame.stream_id) ==
                 StreamClosedBy.SEND_RST_STREAM):
             f = RstStreamFrame(frame.promised_stream_id)
@@ -329,11 +473,19 @@ def new_receive_rst_stream_frame(self, frame):
 
     return stream_frames, stream_events
 
+# Consumed bytes are only dropped from the front of the frame buffer once there are this many of them.
+FRAME_BUFFER_COMPACT_THRESHOLD = 64 * 1024
+
 def FrameBuffer__init__(self, server=False, skip_client_connection_preface=False):
-    self.data = b''
+    # Received bytes, of which the first _pos have already been parsed into frames.
+    self.data = bytearray()
+    self._pos = 0
     self.max_frame_size = 0
     self._preamble = b'PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n' if server else b''
     self._preamble_len = 0 if skip_client_connection_preface else len(self._preamble)
+    # Number of preamble bytes stripped so far, and whether the whole preamble has been.
+    self._preamble_off = 0
+    self._preamble_done = not self._preamble_len
     self._headers_buffer = []
 
 def new_add_data(self, data):
@@ -342,72 +494,140 @@ def new_add_data(self, data):
 
     :param data: A bytestring containing the byte buffer.
     """
-    if self._preamble_len:
+    if not self._preamble_done:
         data_len = len(data)
-        of_which_preamble = min(self._preamble_len, data_len)
+        of_which_preamble = min(self._preamble_len - self._preamble_off, data_len)
 
-        data = data[of_which_preamble:]
-        self._preamble_len -= of_which_preamble
-        self._preamble = self._preamble[of_which_preamble:]
+        data = memoryview(data)[of_which_preamble:]
+        self._preamble_off += of_which_preamble
+        self._preamble_done = self._preamble_off == self._preamble_len
+
+    try:
+        self.data += data
+    except BufferError:
+        # A parsed frame still holds a view into the buffer, move the unparsed bytes to a new one.
+        self.data = self.data[self._pos:] + data
+        self._pos = 0
+
+def _compact_frame_buffer(self):
+    """Drop the bytes of the frames parsed so far from the front of the frame buffer."""
+    try:
+        del self.data[:self._pos]
+    except BufferError:
+        self.data = self.data[self._pos:]
+    self._pos = 0
 
-    self.data += data
+def new__next__(self, _parse_frame_header=Frame.parse_frame_header, _len=len, _memoryview=memoryview):
+    """
+    Modified __next__ to convert CONTINUATION frames to independent HEADERS frames
 
-def new__next__(self):
-    """Modified __next__ to convert CONTINUATION frames to independent HEADERS frames"""
-    if len(self.data) < 9:
+    The keyword arguments only bind hot globals and builtins as locals, they are never passed.
+    """
+    data = self.data
+    pos = self._pos
+    data_len = _len(data)
+    if data_len - pos < 9:
         raise StopIteration()
 
     try:
-        frame_type = self.data[3]
-        stream_id = int.from_bytes(self.data[5:9], byteorder='big') & 0x7FFFFFFF
-        
-        # If it's a CONTINUATION frame, convert to HEADERS frame
-        if frame_type == 0x9:  # CONTINUATION frame type
-            new_data = bytearray(self.data)
-            new_data[3] = 0x1  # Change to HEADERS frame type
-            
-            # Ensure each CONTINUATION is treated as an independent HEADERS frame
-            # by setting appropriate flags
-            flags = new_data[4]
-            if flags & 0x4:  # END_HEADERS flag
-                new_data[4] = flags | 0x4  # Keep END_HEADERS
-            else:
-                new_data[4] = flags & ~0x4  # Remove END_HEADERS
-                
-            self.data = bytes(new_data)
-        
-        f, length = Frame.parse_frame_header(self.data[:9])
+        # If it's a CONTINUATION frame, convert to HEADERS frame. The flags are kept
+        # as they are, so each CONTINUATION is treated as an independent HEADERS frame
+        # that only ends the header block if it has END_HEADERS set.
+        if data[pos + 3] == 0x9:  # CONTINUATION frame type
+            data[pos + 3] = 0x1  # Change to HEADERS frame type
+
+        with _memoryview(data) as view:
+            f, length = _parse_frame_header(view[pos:pos + 9])
     except (InvalidDataError, InvalidFrameError) as e:
         raise ProtocolError(
             "Received frame with invalid header: %s" % str(e)
         )
 
-    if len(self.data) < length + 9:
+    if data_len - pos < length + 9:
         raise StopIteration()
 
     try:
-        f.parse_body(memoryview(self.data[9:9+length]))
+        f.parse_body(_memoryview(data)[pos + 9:pos + 9 + length])
     except InvalidDataError:
         raise ProtocolError("Received frame with non-compliant data")
     except InvalidFrameError:
         raise FrameDataMissingError("Frame data missing or invalid")
 
-    self.data = self.data[9+length:]
+    # Advance past the frame instead of slicing it off, which would copy the rest of the buffer
+    pos += 9 + length
+    self._pos = pos
+    if pos == data_len or pos >= FRAME_BUFFER_COMPACT_THRESHOLD:
+        _compact_frame_buffer(self)
     return f
 
+def consume_all(self, handler):
+    """
+    Parse every complete frame in the buffer and pass each one to a handler.
+
+    :param handler: Called with each frame, in order.
+    :returns: The list of the handler's return values.
+    """
+    results = []
+    append = results.append
+    next_frame = self.__next__
+    while True:
+        # Only the end of the buffer stops the loop, a StopIteration raised by the handler propagates
+        try:
+            frame = next_frame()
+        except StopIteration:
+            return results
+        append(handler(frame))
+
 def Frame__init__(self, stream_id: int, flags: Iterable[str] = ()):
     #: The stream identifier for the stream this frame was received on.
     #: Set to 0 for frames sent on the connection (stream-id 0).
     self.stream_id = stream_id
 
-    #: The flags set for this frame.
-    self.flags = Flags(self.defined_flags)
+    #: The flag byte of a received frame. The Flags set exposed as `flags` is
+    #: only built from it when it is first accessed, see _get_frame_flags.
+    self._flag_bits = 0
+    self._flags = None
 
     #: The frame length, excluding the nine-byte header.
     self.body_len = 0
 
-    for flag in flags:
-        self.flags.add(flag)
+    if flags:
+        frame_flags = self.flags
+        for flag in flags:
+            frame_flags.add(flag)
+
+def _get_frame_flags(self):
+    """The flags set for this frame."""
+    if self._flags is None:
+        flags = Flags(self.defined_flags)
+        flag_bits = self._flag_bits
+        for flag, flag_bit in self.defined_flags:
+            if flag_bits & flag_bit:
+                flags.add(flag)
+        self._flags = flags
+    return self._flags
+
+def _set_frame_flags(self, flags):
+    self._flags = flags
+
+def _frame_has_flag(frame, flag, flag_bit):
+    """Check for a flag without building the Flags set of a received frame."""
+    if frame._flags is None:
+        return bool(frame._flag_bits & flag_bit)
+    return flag in frame._flags
+
+def new_parse_flags(self, flag_byte):
+    self._flag_bits = flag_byte
+    self._flags = None
+
+def new_parse_padding_data(self, data: memoryview) -> int:
+    if _frame_has_flag(self, 'PADDED', 0x08):
+        try:
+            self.pad_length = data[0]
+        except IndexError:
+            raise InvalidFrameError("Invalid Padding data")
+        return 1
+    return 0
 
 def new_rststream_parse_body(self, data: memoryview):
     try:
@@ -417,32 +637,37 @@ def new_rststream_parse_body(self, data: memoryview):
 
     self.body_len = 4
 
+# Entry count from which a SETTINGS body is decoded by struct.iter_unpack. Below it a Python
+# loop over the entries is faster.
+SETTINGS_ITER_MIN_ENTRIES = 3
+
 def new_settings_parse_body(self, data: memoryview):
     body_len = len(data)
-    for i in range(0, (len(data) // 6) * 6, 6):
-        try:
-            name, value = _STRUCT_HL.unpack(data[i:i+6])
-        except struct.error:
-            raise InvalidFrameError("Invalid SETTINGS body")
-
-        self.settings[name] = value
-        # body_len += 6
+    count = body_len // 6  # Any trailing partial entry is ignored
+    settings = self.settings
+    try:
+        if count < SETTINGS_ITER_MIN_ENTRIES:
+            unpack_from = _STRUCT_HL.unpack_from
+            for i in range(0, count * 6, 6):
+                name, value = unpack_from(data, i)
+                settings[name] = value
+        else:
+            settings.update(_STRUCT_HL.iter_unpack(data[:count * 6]))
+    except struct.error:
+        raise InvalidFrameError("Invalid SETTINGS body")
 
     self.body_len = body_len
 
 def new_push_promise_parse_body(self, data: memoryview):
     padding_data_length = self.parse_padding_data(data)
 
-    try:
-        self.promised_stream_id = _STRUCT_L.unpack(
-            data[padding_data_length:padding_data_length + 4]
-        )[0]
-    except struct.error:
+    promised_stream_id = data[padding_data_length:padding_data_length + 4]
+    if len(promised_stream_id) != 4:
         raise InvalidFrameError("Invalid PUSH_PROMISE body")
+    self.promised_stream_id = int.from_bytes(promised_stream_id, 'big')
 
-    self.data = (
-        data[padding_data_length + 4:len(data)-self.pad_length].tobytes()
-    )
+    # Kept as a view, the header block is only read once by the HPACK decoder
+    self.data = data[padding_data_length + 4:len(data)-self.pad_length]
     self.body_len = len(data)
 
     if self.pad_length and self.pad_length >= self.body_len:
@@ -450,13 +675,22 @@ def new_push_promise_parse_body(self, data: memoryview):
 
 
 def new_window_update_parse_body(self, data: memoryview) -> None:
-    try:
-        self.window_increment = _STRUCT_L.unpack(data)[0]
-    except struct.error:
+    # int.from_bytes avoids the result tuple of a Struct unpack, but accepts any length
+    if len(data) != 4:
         raise InvalidFrameError("Invalid WINDOW_UPDATE body")
+    self.window_increment = int.from_bytes(data, 'big')
 
     self.body_len = 4
 
+def _stream_id_was_opened(self, stream_id):
+    """
+    Check whether a stream ID that is not in self.streams belongs to a closed stream,
+    i.e. is not higher than the highest stream ID opened in its direction.
+    """
+    if self._stream_id_is_outbound(stream_id):
+        return stream_id <= self.highest_outbound_stream_id
+    return stream_id <= self.highest_inbound_stream_id
+
 def new_receive_window_update_frame(self, frame):
     """
     Receive a WINDOW_UPDATE frame on the connection.
@@ -469,8 +703,13 @@ def new_receive_window_update_frame(self, frame):
     )
 
     if frame.stream_id:
+        stream = self.streams.get(frame.stream_id)
+        if stream is None:
+            # Same outcome as _get_stream_by_id without raising for closed streams
+            if not _stream_id_was_opened(self, frame.stream_id):
+                raise NoSuchStreamError(frame.stream_id)
+            return [], events
         try:
-            stream = self._get_stream_by_id(frame.stream_id)
             frames, stream_events = stream.receive_window_update(
                 frame.window_increment
             )
@@ -490,16 +729,22 @@ def new_receive_window_update_frame(self, frame):
     return frames, events + stream_events
 
 
+def _continuation_to_headers(f):
+    """Convert CONTINUATION to HEADERS frame to process it independently"""
+    headers_frame = HeadersFrame(f.stream_id)
+    headers_frame.data = f.data
+    headers_frame.flags = f.flags
+    return headers_frame
+
+# Frame types that are replaced before being yielded, any other frame is passed through as is.
+_HEADER_BUFFER_HANDLERS = {
+    ContinuationFrame: _continuation_to_headers,
+}
+
 def new_update_header_buffer(self, f):
     """Simplified header buffer that just passes frames through"""
-    if isinstance(f, ContinuationFrame):
-        # Convert CONTINUATION to HEADERS frame to process it independently
-        headers_frame = HeadersFrame(f.stream_id)
-        headers_frame.data = f.data
-        headers_frame.flags = f.flags
-        return headers_frame
-    
-    return f
+    handler = _HEADER_BUFFER_HANDLERS.get(type(f))
+    return handler(f) if handler is not None else f
 
 def new_send_data(self, stream_id, data, end_stream=False, pad_length=None):
     """
@@ -517,17 +762,29 @@ def new_send_data(self, stream_id, data, end_stream=False, pad_length=None):
             raise ValueError("pad_length must be within range: [0, 255]")
         frame_size += pad_length + 1
 
-    # Create and send DATA frame directly
-    df = DataFrame(stream_id)
-    df.data = data
-    if end_stream:
-        df.flags.add('END_STREAM')
-    if pad_length is not None:
+    if pad_length is None:
+        # Unpadded frames are written directly: the 9-byte header and the payload are
+        # queued as separate chunks, so the payload is not copied into a frame.
+        data = bytes(data)
+        self._data_to_send.append(_STRUCT_HBBBL.pack(
+            (frame_size >> 8) & 0xFFFF,  # Length spread over top 24 bits
+            frame_size & 0xFF,
+            0x0,  # DATA frame type
+            0x1 if end_stream else 0x0,  # END_STREAM flag
+            stream_id & 0x7FFFFFFF,
+        ))
+        self._data_to_send.append(data)
+    else:
+        # Create and send DATA frame directly
+        df = DataFrame(stream_id)
+        df.data = data
+        if end_stream:
+            df.flags.add('END_STREAM')
         df.flags.add('PADDED')
         df.pad_length = pad_length
 
-    # Serialize the frame and add it to the output buffer
-    self._data_to_send += df.serialize()
+        # Serialize the frame and add it to the output buffer
+        self._data_to_send.append(df.serialize())
     
     # Update flow control window
     self.outbound_flow_control_window -= frame_size
@@ -554,15 +811,17 @@ def new_receive_naked_continuation(self, frame):
     self._header_frames.append(frame)
     
     if 'END_HEADERS' in frame.flags:
-        # End of headers, process them.
+        # End of headers, process them. Joining a list lets bytes.join size the
+        # header block in one pass, which it cannot do for a generator.
+        header_frames = self._header_frames
         headers = _decode_headers(
             self.decoder,
-            b''.join(f.data for f in self._header_frames)
+            b''.join([f.data for f in header_frames])
         )
         self._header_frames = []
         
         # Process according to the type of the first frame.
-        first = self._header_frames[0]
+        first = header_frames[0]
         if isinstance(first, HeadersFrame):
             return self._receive_headers(first, headers)
         elif isinstance(first, PushPromiseFrame):
@@ -578,12 +837,10 @@ def new_receive_data_frame(self, frame):
     Modified _receive_data_frame to handle DATA frames in any state
     """
     # Don't enforce stream state checks
-    flow_controlled_length = len(frame.data) + frame.pad_length + 1 if frame.pad_length else len(frame.data)
-    
-    # Maintain the flow control window
-    self._inbound_flow_control_window_manager.window_consumed(
-        flow_controlled_length
-    )
+
+    # Maintain the flow control window. The whole frame payload counts against it,
+    # which parse_body already recorded as body_len (data + pad length byte + padding).
+    self._inbound_flow_control_window_manager.window_consumed(frame.body_len)
     
     # Return the event
     return [], [DataReceived()]
@@ -672,6 +929,7 @@ def receive_headers(self, headers, end_stream, header_encoding):
     return [], events
 
 redefine_methods(settings, {'_validate_setting': new_validate_setting})
+redefine_methods(Settings, {'__setitem__': new_settings_setitem})
 redefine_methods(H2Configuration, {'__init__': H2Configuration__init__})
 redefine_methods(H2Connection, {
     '__init__': H2Connection__init__modified,
@@ -679,19 +937,33 @@ redefine_methods(H2Connection, {
     '_receive_push_promise_frame': new_receive_push_promise_frame,
     '_receive_priority_frame': new_receive_priority_frame,
     'initiate_connection': new_initiate_connection,
+    '_prepare_for_sending': new_prepare_for_sending,
+    'data_to_send': new_data_to_send,
+    'clear_outbound_data_buffer': new_clear_outbound_data_buffer,
     '_receive_rst_stream_frame': new_receive_rst_stream_frame,
     '_receive_window_update_frame': new_receive_window_update_frame,
     'send_data': new_send_data,
     '_receive_data_frame': new_receive_data_frame,
-    '_receive_naked_continuation': new_receive_naked_continuation
+    '_receive_naked_continuation': new_receive_naked_continuation,
+    '_receive_frame': new_receive_frame,
+    'receive_data': new_receive_data
 })
+H2Connection._frame_dispatch_table = {
+    frame_type: getattr(H2Connection, handler) for frame_type, handler in _FRAME_DISPATCH_HANDLERS.items()
+}
 redefine_methods(FrameBuffer, {
     '__init__': FrameBuffer__init__, 
     'add_data': new_add_data, 
     '__next__': new__next__, 
+    'consume_all': consume_all,
     '_update_header_buffer': new_update_header_buffer
 })
-redefine_methods(Frame, {'__init__': Frame__init__})
+redefine_methods(Frame, {
+    '__init__': Frame__init__,
+    'flags': property(_get_frame_flags, _set_frame_flags),
+    'parse_flags': new_parse_flags
+})
+redefine_methods(Padding, {'parse_padding_data': new_parse_padding_data})
 redefine_methods(RstStreamFrame, {'parse_body': new_rststream_parse_body})
 redefine_methods(SettingsFrame, {'parse_body': new_settings_parse_body})
 redefine_methods(PushPromiseFrame, {'parse_body': new_push_promise_parse_body})
@@ -1,10 +1,14 @@
 import base64
+import errno
 import pickle
 import random
 import socket
 import select
+import selectors
 import ssl
 import struct
+import threading
+import time
 from dnslib import DNSRecord, QTYPE
 
 
@@ -296,6 +300,161 @@ def send_echo_once_tcp (ip, port, message, timeout=0.5):
 
     return response.decode('utf-8', errors='ignore')
 
+# Idle TCP echo connections, keyed by (pool key, ip, port) so a key reused for another
+# target never sends over the connection opened for the previous one.
+_ECHO_POOL = {}
+_ECHO_POOL_LOCK = threading.Lock()
+
+def close_echo_pool():
+    """
+    Close all idle pooled TCP echo connections.
+    """
+    with _ECHO_POOL_LOCK:
+        sockets = list(_ECHO_POOL.values())
+        _ECHO_POOL.clear()
+    for s in sockets:
+        try:
+            s.close()
+        except socket.error:
+            pass
+
+def _open_echo_connection(ip, port, timeout):
+    s = socket.create_connection((ip, port), timeout=timeout)
+    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    return s
+
+def send_echo_tcp_pooled(ip, port, message, timeout=0.5, pool_key=None):
+    """
+    Send the message to the echo server over a pooled TCP connection and read the
+    echoed bytes back, keeping the connection open for the next call with the same key.
+    Echo servers send back exactly what they receive, so the reply is complete once as
+    many bytes as were sent have arrived. A pooled connection the server has closed
+    in the meantime is replaced by a new one. Pooled connections stay open until
+    close_echo_pool is called.
+    Returns the echoed string or None on error/timeout.
+    """
+    key = (pool_key, ip, port)
+    payload = message.encode()
+    with _ECHO_POOL_LOCK:
+        s = _ECHO_POOL.pop(key, None)
+    if s is not None:
+        # An idle connection should have nothing to read, otherwise it was closed or is out of sync
+        ready_to_read, _, _ = select.select([s], [], [], 0)
+        if ready_to_read:
+            s.close()
+            s = None
+
+    while True:
+        reused = s is not None
+        response = bytearray()
+        try:
+            if s is None:
+                s = _open_echo_connection(ip, port, timeout)
+            s.settimeout(timeout)
+            s.sendall(payload)
+            while len(response) < len(payload):
+                ready_to_read, _, _ = select.select([s], [], [], timeout)
+                if not ready_to_read:
+                    break  # No more data within 'timeout' seconds
+                chunk = s.recv(4096)
+                if not chunk:
+                    break  # Server closed connection
+                response += chunk
+        except (socket.error, socket.timeout):
+            response = None
+
+        if response and len(response) == len(payload):
+            break
+        if s is not None:
+            s.close()
+            s = None
+        if not reused:
+            return response.decode('utf-8', errors='ignore') if response else None
+        # The pooled connection went away before echoing anything, retry once on a new one
+
+    with _ECHO_POOL_LOCK:
+        previous = _ECHO_POOL.setdefault(key, s)
+    if previous is not s:
+        s.close()
+
+    return response.decode('utf-8', errors='ignore')
+
+def send_echo_many_tcp(targets, message, timeout=0.5):
+    """
+    Run one-shot TCP echo requests against several (ip, port) targets concurrently.
+    Each target gets its own connection, like send_echo_once_tcp, but all of them are
+    driven by a single selector so the total time is bounded by the slowest target
+    instead of the sum over all targets. A target must connect within 'timeout'
+    seconds, and its echo is complete once it closes the connection or stays silent
+    for 'timeout' seconds.
+    Returns the list of echoed strings, with None for the targets that failed.
+    """
+    payload = message.encode()
+    responses = [None] * len(targets)
+    pending = {}
+    received = {}
+    deadlines = {}
+
+    def finish(sock, connected):
+        index = selector.get_key(sock).data
+        selector.unregister(sock)
+        sock.close()
+        del deadlines[sock]
+        if connected:
+            responses[index] = bytes(received[index]).decode('utf-8', errors='ignore')
+
+    with selectors.DefaultSelector() as selector:
+        for index, (ip, port) in enumerate(targets):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            try:
+                result = sock.connect_ex((ip, int(port)))
+            except socket.error:
+                result = None
+            if result not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                sock.close()
+                continue
+            pending[sock] = payload
+            received[index] = bytearray()
+            deadlines[sock] = time.monotonic() + timeout
+            selector.register(sock, selectors.EVENT_WRITE, index)
+
+        while deadlines:
+            now = time.monotonic()
+            for sock, deadline in list(deadlines.items()):
+                if deadline <= now:
+                    # Still connecting or sending is a failure, silence while reading ends the echo
+                    finish(sock, connected=sock not in pending)
+            if not deadlines:
+                break
+
+            for key, mask in selector.select(min(deadlines.values()) - now):
+                sock = key.fileobj
+                try:
+                    if mask & selectors.EVENT_WRITE:
+                        if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR):
+                            finish(sock, connected=False)
+                            continue
+                        sent = sock.send(pending[sock])
+                        pending[sock] = pending[sock][sent:]
+                        if not pending[sock]:
+                            del pending[sock]
+                            selector.modify(sock, selectors.EVENT_READ, key.data)
+                        deadlines[sock] = time.monotonic() + timeout
+                    else:
+                        chunk = sock.recv(4096)
+                        if not chunk:
+                            finish(sock, connected=True)  # Server closed connection
+                            continue
+                        received[key.data] += chunk
+                        deadlines[sock] = time.monotonic() + timeout
+                except socket.error:
+                    pending.pop(sock, None)
+                    finish(sock, connected=False)
+
+    return responses
+
 def send_echo_once_udp(ip, port, message, timeout=0.5):
     """
     Send a single UDP datagram to (ip, port), then wait for up to 'timeout'
@@ -0,0 +1,75 @@
+import unittest
+
+from scapy.all import IP, DNS
+
+from nopasaran.primitives.action_primitives.dns_primitives import DNSPrimitives
+
+
+class _Machine:
+    """
+    Holds the variables of the primitives under test, like a state machine would.
+    """
+    def __init__(self):
+        self.variables = {}
+
+    def get_variable_value(self, name):
+        return self.variables[name]
+
+    def set_variable_value(self, name, value):
+        self.variables[name] = value
+
+
+class ResourceRecordReleaseTest(unittest.TestCase):
+    def test_release_attached_record(self):
+        machine = _Machine()
+        DNSPrimitives.create_DNS_packet("(packet)", machine)
+        DNSPrimitives.create_DNS_resource_record("(record)", machine)
+        machine.variables["record"].rrname = b"example.com."
+        machine.variables["record"].rdata = "192.0.2.1"
+        DNSPrimitives.add_DNS_response_to_answer("(packet record) (packet)", machine)
+        DNSPrimitives.release_DNS_resource_record("(record)", machine)
+
+        # The packet is serialized as it would be when sent
+        answer = IP(bytes(machine.variables["packet"]))[DNS].an[0]
+        self.assertEqual(answer.rrname, b"example.com.")
+        self.assertEqual(answer.rdata, "192.0.2.1")
+
+        # A new record does not reuse the one still held by the packet
+        DNSPrimitives.create_DNS_resource_record("(new_record)", machine)
+        self.assertIsNot(machine.variables["new_record"], answer)
+        self.assertEqual(machine.variables["new_record"].rrname, b".")
+
+    def test_release_detached_record(self):
+        machine = _Machine()
+        DNSPrimitives.create_DNS_resource_record("(record)", machine)
+        record = machine.variables["record"]
+        record.rrname = b"example.com."
+        DNSPrimitives.release_DNS_resource_record("(record)", machine)
+        self.assertIsNone(machine.variables["record"])
+
+        DNSPrimitives.create_DNS_resource_record("(record)", machine)
+        self.assertIs(machine.variables["record"], record)
+        self.assertEqual(record.rrname, b".")
+
+
+class QueryNameTest(unittest.TestCase):
+    def test_packet_without_question(self):
+        machine = _Machine()
+        DNSPrimitives.create_fast_dns_query_packet_with_qdcount_mismatch("(packet)", machine)
+        DNSPrimitives.get_query_name("(packet) (name)", machine)
+        DNSPrimitives.get_query_name_bytes("(packet) (name_bytes)", machine)
+        self.assertIsNone(machine.variables["name"])
+        self.assertIsNone(machine.variables["name_bytes"])
+
+    def test_packet_with_question(self):
+        machine = _Machine()
+        DNSPrimitives.create_fast_DNS_packet("(packet)", machine)
+        machine.variables["packet"].qname = b"example.com."
+        DNSPrimitives.get_query_name("(packet) (name)", machine)
+        DNSPrimitives.get_query_name_bytes("(packet) (name_bytes)", machine)
+        self.assertEqual(machine.variables["name"], "example.com.")
+        self.assertEqual(machine.variables["name_bytes"], b"example.com.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import socket
+import threading
+import unittest
+
+from nopasaran import utils
+
+
+class _EchoServer:
+    """
+    TCP echo server on an ephemeral loopback port.
+    """
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._echo, args=(conn,), daemon=True).start()
+
+    def _echo(self, conn):
+        with conn:
+            while True:
+                data = conn.recv(4096)
+                if not data:
+                    return
+                conn.sendall(data)
+
+    def close(self):
+        self.sock.close()
+
+
+class EchoPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.first = _EchoServer()
+        self.second = _EchoServer()
+
+    def tearDown(self):
+        utils.close_echo_pool()
+        self.first.close()
+        self.second.close()
+
+    def _peer_port(self, key, port):
+        return utils._ECHO_POOL[(key, "127.0.0.1", port)].getpeername()[1]
+
+    def test_reused_key_with_another_target(self):
+        self.assertEqual(utils.send_echo_tcp_pooled("127.0.0.1", self.first.port, "a", 1, "k"), "a")
+        self.assertEqual(utils.send_echo_tcp_pooled("127.0.0.1", self.second.port, "b", 1, "k"), "b")
+        self.assertEqual(self._peer_port("k", self.first.port), self.first.port)
+        self.assertEqual(self._peer_port("k", self.second.port), self.second.port)
+
+    def test_close_echo_pool(self):
+        utils.send_echo_tcp_pooled("127.0.0.1", self.first.port, "a", 1, "k")
+        pooled = utils._ECHO_POOL[("k", "127.0.0.1", self.first.port)]
+        utils.close_echo_pool()
+        self.assertEqual(utils._ECHO_POOL, {})
+        self.assertEqual(pooled.fileno(), -1)
+
+
+if __name__ == "__main__":
+    unittest.main()